@@ -2,17 +2,51 @@
 Espeonage - A Pokémon Showdown replay parser and battle simulator
 """
 
+import importlib
+
 __version__ = "0.1.0"
 
-from .replay_parser import ReplayParser
-from .pokemon_tracker import PokemonTracker, PokemonData
-from .damage_calculator import DamageCalculator
-from .battle_simulator import BattleSimulator
+# Public names are imported on first access so that light entry points
+# (e.g. ``espeonage --help``) don't pay for loading every submodule
+_LAZY_IMPORTS = {
+    "ReplayParser": ".replay_parser",
+    "LogEntry": ".replay_parser",
+    "PokemonTracker": ".pokemon_tracker",
+    "PokemonData": ".pokemon_tracker",
+    "DamageCalculator": ".damage_calculator",
+    "BattleSimulator": ".battle_simulator",
+}
+
+# Submodules, also resolved on first attribute access (espeonage.replay_parser)
+_SUBMODULES = frozenset({
+    "replay_parser",
+    "pokemon_tracker",
+    "battle_simulator",
+    "damage_calculator",
+    "cli",
+})
 
 __all__ = [
     "ReplayParser",
+    "LogEntry",
     "PokemonTracker",
     "PokemonData",
     "DamageCalculator",
     "BattleSimulator"
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    if name in _SUBMODULES:
+        # Importing a submodule also binds it as an attribute of the package
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -2,156 +2,269 @@
 Battle simulator that processes replay logs and tracks battle state
 """
 
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
 from .pokemon_tracker import PokemonTracker
 from .damage_calculator import DamageCalculator
+from .replay_parser import LogEntry
 
 
-class BattleSimulator:
-    """Simulates battle progress from replay logs"""
-    
-        # Comprehensive list of non-attacking moves to filter out
-    NON_ATTACK_MOVES = {
-        # Status moves
-        'Toxic', 'Thunder Wave', 'Will-O-Wisp', 'Spore', 'Sleep Powder', 'Stun Spore',
-        'Hypnosis', 'Yawn', 'Poison Powder', 'Glare', 'Paralyze', 'Confuse Ray',
-        'Supersonic', 'Swagger', 'Sweet Kiss', 'Attract', 'Taunt', 'Torment',
-        'Encore', 'Disable', 'Heal Block', 'Embargo', 'Leech Seed',
+# Characters dropped when normalizing a move name to its ID
+_MOVE_ID_STRIP = str.maketrans('', '', " -'")
+
+
+@lru_cache(maxsize=4096)
+def _move_id(move: str) -> str:
+    """Normalize a move name to its ID (e.g. "King's Shield" -> 'kingsshield')"""
+    return move.lower().translate(_MOVE_ID_STRIP)
+
+
+# Comprehensive list of non-attacking moves to filter out, as display names
+_NON_ATTACK_MOVE_NAMES = frozenset((
+    # Status moves
+    'Toxic', 'Thunder Wave', 'Will-O-Wisp', 'Spore', 'Sleep Powder', 'Stun Spore',
+    'Hypnosis', 'Yawn', 'Poison Powder', 'Glare', 'Paralyze', 'Confuse Ray',
+    'Supersonic', 'Swagger', 'Sweet Kiss', 'Attract', 'Taunt', 'Torment',
+    'Encore', 'Disable', 'Heal Block', 'Embargo', 'Leech Seed',
+
+    # Entry hazards
+    'Spikes', 'Toxic Spikes', 'Stealth Rock', 'Sticky Web',
+
+    # Field effects
+    'Trick Room', 'Magic Room', 'Wonder Room', 'Gravity', 'Grassy Terrain',
+    'Misty Terrain', 'Electric Terrain', 'Psychic Terrain', 'Rain Dance',
+    'Sunny Day', 'Sandstorm', 'Hail', 'Snow', 'Tailwind', 'Light Screen',
+    'Reflect', 'Aurora Veil', 'Safeguard', 'Mist',
+
+    # Boosting/status moves
+    'Swords Dance', 'Dragon Dance', 'Nasty Plot', 'Calm Mind', 'Bulk Up',
+    'Agility', 'Rock Polish', 'Quiver Dance', 'Shift Gear', 'Coil',
+    'Curse', 'Iron Defense', 'Amnesia', 'Acid Armor', 'Barrier',
+    'Cosmic Power', 'Cotton Guard', 'Defend Order', 'Harden', 'Withdraw',
+    'Defense Curl', 'Stockpile', 'Charge', 'Focus Energy', 'Meditate',
+    'Sharpen', 'Acupressure', 'Howl', 'Work Up', 'Growth', 'Hone Claws',
+    'Shell Smash', 'Tail Glow', 'Geomancy', 'No Retreat',
+
+    # Recovery moves
+    'Recover', 'Roost', 'Slack Off', 'Soft-Boiled', 'Rest', 'Wish',
+    'Healing Wish', 'Lunar Dance', 'Heal Order', 'Milk Drink', 'Moonlight',
+    'Morning Sun', 'Synthesis', 'Heal Bell', 'Aromatherapy', 'Refresh',
+    'Purify', 'Life Dew', 'Shore Up', 'Swallow', 'Strength Sap',
+
+    # Protection moves
+    'Protect', 'Detect', 'Endure', 'King\'s Shield', 'Spiky Shield',
+    'Baneful Bunker', 'Obstruct', 'Silk Trap', 'Burning Bulwark',
 
-        # Entry hazards
-        'Spikes', 'Toxic Spikes', 'Stealth Rock', 'Sticky Web',
+    # Switching/pivot moves (these don't directly deal KO damage)
+    'Teleport', 'Baton Pass', 'Parting Shot', 'Shed Shell',
 
-        # Field effects
-        'Trick Room', 'Magic Room', 'Wonder Room', 'Gravity', 'Grassy Terrain',
-        'Misty Terrain', 'Electric Terrain', 'Psychic Terrain', 'Rain Dance',
-        'Sunny Day', 'Sandstorm', 'Hail', 'Snow', 'Tailwind', 'Light Screen',
-        'Reflect', 'Aurora Veil', 'Safeguard', 'Mist',
+    # Support moves
+    'Substitute', 'Helping Hand', 'Follow Me', 'Rage Powder', 'Spotlight',
+    'Ally Switch', 'Trick', 'Switcheroo', 'Bestow', 'Instruct',
+    'Skill Swap', 'Role Play', 'Entrainment', 'Guard Split', 'Power Split',
+    'Speed Swap', 'Guard Swap', 'Power Swap', 'Heart Swap', 'Mimic',
+    'Transform', 'Copycat', 'Me First', 'Snatch', 'Recycle', 'Metronome',
 
-        # Boosting/status moves
-        'Swords Dance', 'Dragon Dance', 'Nasty Plot', 'Calm Mind', 'Bulk Up',
-        'Agility', 'Rock Polish', 'Quiver Dance', 'Shift Gear', 'Coil',
-        'Curse', 'Iron Defense', 'Amnesia', 'Acid Armor', 'Barrier',
-        'Cosmic Power', 'Cotton Guard', 'Defend Order', 'Harden', 'Withdraw',
-        'Defense Curl', 'Stockpile', 'Charge', 'Focus Energy', 'Meditate',
-        'Sharpen', 'Acupressure', 'Howl', 'Work Up', 'Growth', 'Hone Claws',
-        'Shell Smash', 'Tail Glow', 'Geomancy', 'No Retreat',
+    # Other non-damaging moves
+    'Splash', 'Celebrate', 'Hold Hands', 'Happy Hour', 'Conversion',
+    'Conversion 2', 'Camouflage', 'Nightmare', 'Perish Song', 'Mean Look',
+    'Block', 'Spider Web', 'Sand Tomb', 'Whirlpool', 'Bind', 'Wrap',
+    'Fire Spin', 'Magma Storm', 'Infestation', 'Clamp', 'Snore', 'Forest\'s Curse',
+    'Trick-or-Treat', 'Rototiller', 'Magnetic Flux', 'Gear Up',
+    'Flower Shield', 'Ion Deluge', 'Powder', 'Tearful Look', 'Baby-Doll Eyes',
+    'Play Nice', 'Venom Drench', 'Belly Drum', 'Psych Up', 'Power Trick',
+))
 
-        # Recovery moves
-        'Recover', 'Roost', 'Slack Off', 'Soft-Boiled', 'Rest', 'Wish',
-        'Healing Wish', 'Lunar Dance', 'Heal Order', 'Milk Drink', 'Moonlight',
-        'Morning Sun', 'Synthesis', 'Heal Bell', 'Aromatherapy', 'Refresh',
-        'Purify', 'Life Dew', 'Shore Up', 'Swallow', 'Strength Sap',
 
-        # Protection moves
-        'Protect', 'Detect', 'Endure', 'King\'s Shield', 'Spiky Shield',
-        'Baneful Bunker', 'Obstruct', 'Silk Trap', 'Burning Bulwark',
+@lru_cache(maxsize=8)
+def _move_ids(moves: frozenset) -> frozenset:
+    """Normalize a set of move names to move IDs"""
+    return frozenset(_move_id(move) for move in moves)
 
-        # Switching/pivot moves (these don't directly deal KO damage)
-        'Teleport', 'Baton Pass', 'Parting Shot', 'Shed Shell',
 
-        # Support moves
-        'Substitute', 'Helping Hand', 'Follow Me', 'Rage Powder', 'Spotlight',
-        'Ally Switch', 'Trick', 'Switcheroo', 'Bestow', 'Instruct',
-        'Skill Swap', 'Role Play', 'Entrainment', 'Guard Split', 'Power Split',
-        'Speed Swap', 'Guard Swap', 'Power Swap', 'Heart Swap', 'Mimic',
-        'Transform', 'Copycat', 'Me First', 'Snatch', 'Recycle', 'Metronome',
+# The same moves as IDs, so lookups ignore case, spaces and punctuation
+_NON_ATTACK_MOVES = _move_ids(_NON_ATTACK_MOVE_NAMES)
 
-        # Other non-damaging moves
-        'Splash', 'Celebrate', 'Hold Hands', 'Happy Hour', 'Conversion',
-        'Conversion 2', 'Camouflage', 'Nightmare', 'Perish Song', 'Mean Look',
-        'Block', 'Spider Web', 'Sand Tomb', 'Whirlpool', 'Bind', 'Wrap',
-        'Fire Spin', 'Magma Storm', 'Infestation', 'Clamp', 'Snore', 'Forest\'s Curse',
-        'Trick-or-Treat', 'Rototiller', 'Magnetic Flux', 'Gear Up', 'Electric Terrain',
-        'Flower Shield', 'Ion Deluge', 'Powder', 'Tearful Look', 'Baby-Doll Eyes',
-        'Play Nice', 'Venom Drench', 'Stockpile', 'Belly Drum', 'Psych Up',
-        'Power Trick', 'Guard Split', 'Power Split', 'Speed Swap',
-    }
+
+# Source of indirect damage, from the '[from] <source>' tag on -damage, mapped to
+# its category. 'item: ...' and 'ability: ...' sources are looked up by prefix.
+# Damage from these is not a hit by the opponent, so it is not credited to them
+_DAMAGE_SOURCE_CATEGORY = {
+    'psn': 'status', 'tox': 'status', 'brn': 'status', 'confusion': 'status',
+    'Stealth Rock': 'hazard', 'Spikes': 'hazard', 'G-Max Steelsurge': 'hazard',
+    'Sandstorm': 'weather', 'Hail': 'weather',
+    'Leech Seed': 'residual', 'Curse': 'residual', 'Nightmare': 'residual',
+    'Salt Cure': 'residual', 'Bad Dreams': 'residual',
+    'Recoil': 'recoil', 'Struggle Recoil': 'recoil', 'Mind Blown': 'recoil',
+    'Steel Beam': 'recoil',
+    'item': 'item', 'ability': 'ability',
+}
+
+
+@lru_cache(maxsize=256)
+def _damage_source_category(tag: str) -> str:
+    """Category of a '[from] <source>' damage tag; 'move' if not indirect"""
+    source = tag[6:].strip()
+    category = _DAMAGE_SOURCE_CATEGORY.get(source)
+    if category is None:
+        category = _DAMAGE_SOURCE_CATEGORY.get(source.partition(':')[0], 'move')
+    return category
+
+
+class BattleSimulator:
+    """Simulates battle progress from replay logs"""
+    
+    NON_ATTACK_MOVES = _NON_ATTACK_MOVE_NAMES
 
     def __init__(self):
         self.tracker = PokemonTracker()
         self.calculator = DamageCalculator()
+        
+        # Tracker methods bound once for the per-entry handlers
+        self._register_pokemon = self.tracker.register_pokemon
+        self._apply_damage = self.tracker.apply_damage
+        self._track_hp = self.tracker.track_hp
+        self._track_faint = self.tracker.track_faint
+        self._track_move = self.tracker.track_move
+        self._track_ko = self.tracker.track_knockout
+        self._track_ability = self.tracker.track_ability
+        self._track_item = self.tracker.track_item
         self.active_pokemon = {'p1': None, 'p2': None}
-        self.last_move = {}
+        # Last move per side (index 0 = p1, 1 = p2): acting Pokémon and move name
+        self._last_move_poke: List[Optional[str]] = [None, None]
+        self._last_move_move: List[Optional[str]] = [None, None]
+        # Whether the last damage taken per side came from an opposing move
+        self._last_damage_direct: List[bool] = [True, True]
+        # Raw ident -> (pokemon_id, player, name, side); a battle has only a handful
+        self._ident_cache: Dict[str, tuple] = {}
+        # Raw HP string -> (hp, max_hp, status); values repeat heavily
+        self._hp_cache: Dict[str, tuple] = {}
+        
+        # Command type -> handler; informational commands are simply absent
+        self._dispatch = {
+            'poke': self._handle_poke,
+            'switch': self._handle_switch,
+            'drag': self._handle_switch,
+            'move': self._handle_move,
+            '-damage': self._handle_damage,
+            'faint': self._handle_faint,
+            '-ability': self._handle_ability,
+            '-item': self._handle_item,
+            '-heal': self._handle_heal,
+        }
+    
+    def reset(self):
+        """
+        Clear all battle state so the simulator can process another battle
+        
+        Reusing one simulator for a batch of replays avoids rebuilding its
+        tracker, handlers and caches for every battle. Data previously read
+        through get_tracker() is cleared too; summaries already returned by
+        process_battle_log are unaffected.
+        """
+        self.tracker.reset()
+        self.active_pokemon.clear()
+        self.active_pokemon.update(p1=None, p2=None)
+        self._last_move_poke[:] = (None, None)
+        self._last_move_move[:] = (None, None)
+        self._last_damage_direct[:] = (True, True)
+        # Nicknames differ between battles; HP strings are worth keeping
+        self._ident_cache.clear()
         
     def process_battle_log(self, battle_log: List[Dict]) -> Dict:
         """
         Process a battle log and track all relevant information
         
         Args:
-            battle_log: List of parsed battle log entries
+            battle_log: List of parsed battle log entries (LogEntry records
+                or dicts with 'type' and 'args')
+            
+        Returns:
+            Dictionary with battle summary and tracked Pokémon data
+        """
+        return self.process_battle_stream(battle_log)
+    
+    def process_battle_stream(self, entries: Iterable[Dict]) -> Dict:
+        """
+        Process battle log entries from any iterable, consuming it lazily
+        
+        Pair with ReplayParser.iter_battle_log to simulate a raw log as it
+        is parsed, without holding every entry in memory.
+        
+        Args:
+            entries: Iterable of LogEntry records or dicts with 'type' and 'args'
             
         Returns:
             Dictionary with battle summary and tracked Pokémon data
         """
-        for entry in battle_log:
-            self._process_log_entry(entry)
+        # Inlined _process_log_entry: this loop runs once per log line.
+        # Parser entries are read through their slots; plain dicts also work
+        get_handler = self._dispatch.get
+        for entry in entries:
+            if type(entry) is LogEntry:
+                handler = get_handler(entry.type)
+                if handler is not None:
+                    handler(entry.args)
+            else:
+                handler = get_handler(entry.get('type'))
+                if handler is not None:
+                    handler(entry.get('args') or ())
         
+        tracker = self.tracker
         return {
-            'pokemon': self.tracker.get_summary(),
+            'pokemon': tracker.get_summary(),
             'teams': {
-                'p1': [p.name for p in self.tracker.get_team('p1')],
-                'p2': [p.name for p in self.tracker.get_team('p2')],
+                'p1': [p.name for p in tracker.get_team('p1')],
+                'p2': [p.name for p in tracker.get_team('p2')],
             }
         }
     
     def _process_log_entry(self, entry: Dict):
         """Process a single log entry"""
-        cmd_type = entry.get('type')
-        args = entry.get('args', [])
-        
-        if cmd_type == 'player':
-            self._handle_player(args)
-        elif cmd_type == 'teamsize':
-            self._handle_teamsize(args)
-        elif cmd_type == 'gametype':
-            self._handle_gametype(args)
-        elif cmd_type == 'gen':
-            self._handle_gen(args)
-        elif cmd_type == 'tier':
-            self._handle_tier(args)
-        elif cmd_type == 'poke':
-            self._handle_poke(args)
-        elif cmd_type == 'switch' or cmd_type == 'drag':
-            self._handle_switch(args)
-        elif cmd_type == 'move':
-            self._handle_move(args)
-        elif cmd_type == '-damage':
-            self._handle_damage(args)
-        elif cmd_type == 'faint':
-            self._handle_faint(args)
-        elif cmd_type == '-ability':
-            self._handle_ability(args)
-        elif cmd_type == '-item':
-            self._handle_item(args)
-        elif cmd_type == '-enditem':
-            self._handle_enditem(args)
-        elif cmd_type == '-heal':
-            self._handle_heal(args)
+        handler = self._dispatch.get(entry.get('type'))
+        if handler is not None:
+            handler(entry.get('args') or ())
     
     def _parse_pokemon_ident(self, ident: str) -> tuple:
         """Parse Pokémon identifier (e.g., 'p1a: Pikachu')"""
+        try:
+            return self._ident_cache[ident]
+        except KeyError:
+            pass
+        
         if ':' not in ident:
-            return None, None
-        parts = ident.split(':', 1)
-        position = parts[0].strip()
-        name = parts[1].strip()
-        player = position[:2]  # p1, p2, etc.
-        return f"{player}:{name}", player
+            result = (None, None, None, None)
+        else:
+            parts = ident.split(':', 1)
+            position = parts[0].strip()
+            name = parts[1].strip()
+            player = position[:2]  # p1, p2, etc.
+            side = 1 if player == 'p2' else 0
+            result = (f"{player}:{name}", player, name, side)
+        
+        self._ident_cache[ident] = result
+        return result
     
     def _parse_hp(self, hp_str: str) -> tuple:
         """Parse HP string (e.g., '100/100' or '50/100 psn')"""
-        parts = hp_str.split()
-        hp_part = parts[0]
-        status = parts[1] if len(parts) > 1 else None
+        try:
+            return self._hp_cache[hp_str]
+        except KeyError:
+            pass
         
-        if hp_part == '0':
-            return 0, 0, status
+        hp_part, _, status = hp_str.partition(' ')
+        status = status or None
         
-        if '/' in hp_part:
+        if hp_part == '0':
+            result = (0, 0, status)
+        elif '/' in hp_part:
             current, max_hp = hp_part.split('/')
-            return int(current), int(max_hp), status
+            result = (int(current), int(max_hp), status)
+        else:
+            result = (None, None, status)
         
-        return None, None, status
+        self._hp_cache[hp_str] = result
+        return result
     
     def _is_attack_move(self, move: str) -> bool:
         """
@@ -163,29 +276,15 @@ class BattleSimulator:
         Returns:
             True if the move is a direct attack, False otherwise
         """
-        return move not in self.NON_ATTACK_MOVES
+        names = self.NON_ATTACK_MOVES
+        if names is _NON_ATTACK_MOVE_NAMES:
+            move_ids = _NON_ATTACK_MOVES
+        else:
+            # Overridden by a subclass or instance
+            move_ids = _move_ids(frozenset(names))
+        return _move_id(move) not in move_ids
 
     
-    def _handle_player(self, args: List[str]):
-        """Handle player command"""
-        pass
-    
-    def _handle_teamsize(self, args: List[str]):
-        """Handle team size command"""
-        pass
-    
-    def _handle_gametype(self, args: List[str]):
-        """Handle game type command"""
-        pass
-    
-    def _handle_gen(self, args: List[str]):
-        """Handle generation command"""
-        pass
-    
-    def _handle_tier(self, args: List[str]):
-        """Handle tier command"""
-        pass
-    
     def _handle_poke(self, args: List[str]):
         """Handle poke command (team preview)"""
         if len(args) >= 2:
@@ -196,99 +295,89 @@ class BattleSimulator:
     def _handle_switch(self, args: List[str]):
         """Handle switch/drag command"""
         if len(args) >= 2:
-            pokemon_id, player = self._parse_pokemon_ident(args[0])
+            pokemon_id, player, name, _ = self._parse_pokemon_ident(args[0])
             details = args[1]
             hp_str = args[2] if len(args) > 2 else ""
             
             if pokemon_id:
-                name = pokemon_id.split(':')[1]
-                self.tracker.register_pokemon(player, args[0], name, details)
+                self._register_pokemon(player, args[0], name, details, pokemon_id)
                 self.active_pokemon[player] = pokemon_id
                 
                 if hp_str:
                     hp, max_hp, _ = self._parse_hp(hp_str)
                     if hp is not None and max_hp is not None:
-                        self.tracker.track_hp(pokemon_id, hp, max_hp)
+                        self._track_hp(pokemon_id, hp, max_hp)
     
     def _handle_move(self, args: List[str]):
         """Handle move command"""
         if len(args) >= 2:
-            pokemon_id, player = self._parse_pokemon_ident(args[0])
+            pokemon_id, _, _, side = self._parse_pokemon_ident(args[0])
             move = args[1]
             
             if pokemon_id:
-                self.tracker.track_move(pokemon_id, move)
-                self.last_move[player] = {'pokemon': pokemon_id, 'move': move}
+                self._track_move(pokemon_id, move)
+                self._last_move_poke[side] = pokemon_id
+                self._last_move_move[side] = move
     
     def _handle_damage(self, args: List[str]):
         """Handle damage command"""
         if len(args) >= 2:
-            pokemon_id, player = self._parse_pokemon_ident(args[0])
+            pokemon_id, _, _, side = self._parse_pokemon_ident(args[0])
             hp_str = args[1]
             
             if pokemon_id:
-                old_hp = self.tracker.get_pokemon(pokemon_id).hp_current if self.tracker.get_pokemon(pokemon_id) else None
                 hp, max_hp, _ = self._parse_hp(hp_str)
                 
                 if hp is not None and max_hp is not None:
-                    self.tracker.track_hp(pokemon_id, hp, max_hp)
-                    
-                    # Calculate damage dealt
-                    if old_hp is not None:
-                        damage = old_hp - hp
-                        # Find the attacker (opponent's last move)
-                        opponent = 'p1' if player == 'p2' else 'p2'
-                        if opponent in self.last_move:
-                            attacker_id = self.last_move[opponent]['pokemon']
-                            self.tracker.track_damage(attacker_id, pokemon_id, damage)
+                    # Credit the attacker (opponent's last move) unless the
+                    # damage came from poison, hazards, recoil and the like
+                    direct = len(args) < 3 or not args[2].startswith('[from]') or \
+                        _damage_source_category(args[2]) == 'move'
+                    self._last_damage_direct[side] = direct
+                    attacker_id = self._last_move_poke[1 - side] if direct else None
+                    self._apply_damage(pokemon_id, hp, max_hp, attacker_id)
     
     def _handle_faint(self, args: List[str]):
         """Handle faint command"""
         if len(args) >= 1:
-            pokemon_id, player = self._parse_pokemon_ident(args[0])
+            pokemon_id, _, _, side = self._parse_pokemon_ident(args[0])
             
             if pokemon_id:
-                self.tracker.track_faint(pokemon_id)
+                self._track_faint(pokemon_id)
                 
-                # Give credit to the attacker
-                opponent = 'p1' if player == 'p2' else 'p2'
-                if opponent in self.last_move:
-                    attacker_id = self.last_move[opponent]['pokemon']
-                    self.tracker.track_knockout(attacker_id)
+                # Give credit to the attacker, if a move finished it off
+                attacker_id = self._last_move_poke[1 - side]
+                if attacker_id is not None and self._last_damage_direct[side]:
+                    self._track_ko(attacker_id)
     
     def _handle_ability(self, args: List[str]):
         """Handle ability reveal"""
         if len(args) >= 2:
-            pokemon_id, _ = self._parse_pokemon_ident(args[0])
+            pokemon_id, _, _, _ = self._parse_pokemon_ident(args[0])
             ability = args[1]
             
             if pokemon_id:
-                self.tracker.track_ability(pokemon_id, ability)
+                self._track_ability(pokemon_id, ability)
     
     def _handle_item(self, args: List[str]):
         """Handle item reveal"""
         if len(args) >= 2:
-            pokemon_id, _ = self._parse_pokemon_ident(args[0])
+            pokemon_id, _, _, _ = self._parse_pokemon_ident(args[0])
             item = args[1]
             
             if pokemon_id:
-                self.tracker.track_item(pokemon_id, item)
-    
-    def _handle_enditem(self, args: List[str]):
-        """Handle item consumption/removal"""
-        # Item was used/removed, but we already tracked it being revealed
-        pass
+                self._track_item(pokemon_id, item)
     
     def _handle_heal(self, args: List[str]):
         """Handle heal command"""
         if len(args) >= 2:
-            pokemon_id, _ = self._parse_pokemon_ident(args[0])
+            pokemon_id, _, _, _ = self._parse_pokemon_ident(args[0])
             hp_str = args[1]
             
             if pokemon_id:
                 hp, max_hp, _ = self._parse_hp(hp_str)
                 if hp is not None and max_hp is not None:
-                    self.tracker.track_hp(pokemon_id, hp, max_hp)
+                    self._track_hp(pokemon_id, hp, max_hp)
     
     def get_tracker(self) -> PokemonTracker:
         """Get the Pokémon tracker"""
@@ -3,44 +3,137 @@
 Command-line interface for Espeonage
 """
 
-import argparse
+import io
 import json
 import sys
-from .replay_parser import ReplayParser
-from .battle_simulator import BattleSimulator
+
+
+USAGE = "usage: espeonage [-h] [-o OUTPUT] [-f {json,text}] [--verbose] replay"
+
+HELP = USAGE + """
+
+Espeonage - Pokémon Showdown replay parser and battle simulator
+
+positional arguments:
+  replay                Path to replay file or URL to replay
+
+options:
+  -h, --help            show this help message and exit
+  -o OUTPUT, --output OUTPUT
+                        Output file for results (default: stdout)
+  -f {json,text}, --format {json,text}
+                        Output format (json, text)
+  --verbose             Verbose output"""
+
+
+# Long options, which may be abbreviated to any unambiguous prefix
+_LONG_OPTIONS = ('--help', '--output', '--format', '--verbose')
+
+
+class CLIArgs:
+    """Parsed command-line arguments"""
+    
+    def __init__(self):
+        self.replay = None
+        self.output = None
+        self.format = 'text'
+        self.verbose = False
+
+
+def _usage_error(message: str):
+    """Print a usage error and exit with status 2"""
+    print(USAGE, file=sys.stderr)
+    print(f"espeonage: error: {message}", file=sys.stderr)
+    sys.exit(2)
+
+
+def _expand_long_option(arg: str) -> str:
+    """Expand an abbreviated long option (e.g. '--out=x' -> '--output=x')"""
+    name, eq, value = arg.partition('=')
+    if name in _LONG_OPTIONS:
+        return arg
+    
+    matches = [option for option in _LONG_OPTIONS if option.startswith(name)]
+    if len(matches) > 1:
+        _usage_error(f"ambiguous option: {name} could match {', '.join(matches)}")
+    if matches:
+        return matches[0] + eq + value
+    return arg
+
+
+def parse_args(argv: list) -> CLIArgs:
+    """
+    Parse command-line arguments
+    
+    Args:
+        argv: Argument list, excluding the program name
+        
+    Returns:
+        CLIArgs with the parsed options
+    """
+    args = CLIArgs()
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        i += 1
+        
+        if arg == '--':
+            # End of options: everything after is positional
+            for arg in argv[i:]:
+                if args.replay is None:
+                    args.replay = arg
+                else:
+                    _usage_error(f"unrecognized arguments: {arg}")
+            break
+        
+        if arg.startswith('--') and len(arg) > 2:
+            arg = _expand_long_option(arg)
+        
+        if arg in ('-h', '--help'):
+            print(HELP)
+            sys.exit(0)
+        elif arg == '--verbose':
+            args.verbose = True
+        elif arg[:2] in ('-o', '-f') or arg.partition('=')[0] in ('--output', '--format'):
+            if arg.startswith('--') and '=' in arg:
+                arg, value = arg.split('=', 1)
+            elif not arg.startswith('--') and len(arg) > 2:
+                # Value attached to a short option: -oresults.txt, -f=json
+                arg, value = arg[:2], arg[2:]
+                if value.startswith('='):
+                    value = value[1:]
+            elif i < len(argv):
+                value = argv[i]
+                i += 1
+            else:
+                _usage_error(f"argument {arg}: expected one argument")
+            
+            if arg in ('-o', '--output'):
+                args.output = value
+            elif value in ('json', 'text'):
+                args.format = value
+            else:
+                _usage_error(f"argument -f/--format: invalid choice: '{value}' (choose from 'json', 'text')")
+        elif arg.startswith('-') and arg != '-':
+            _usage_error(f"unrecognized arguments: {arg}")
+        elif args.replay is None:
+            args.replay = arg
+        else:
+            _usage_error(f"unrecognized arguments: {arg}")
+    
+    if args.replay is None:
+        _usage_error("the following arguments are required: replay")
+    
+    return args
 
 
 def main():
     """Main CLI entry point"""
-    parser = argparse.ArgumentParser(
-        description='Espeonage - Pokémon Showdown replay parser and battle simulator'
-    )
-    
-    parser.add_argument(
-        'replay',
-        help='Path to replay file or URL to replay'
-    )
-    
-    parser.add_argument(
-        '-o', '--output',
-        help='Output file for results (default: stdout)',
-        default=None
-    )
-    
-    parser.add_argument(
-        '-f', '--format',
-        help='Output format (json, text)',
-        choices=['json', 'text'],
-        default='text'
-    )
-    
-    parser.add_argument(
-        '--verbose',
-        help='Verbose output',
-        action='store_true'
-    )
-    
-    args = parser.parse_args()
+    args = parse_args(sys.argv[1:])
+    
+    # Imported after argument parsing so --help and usage errors stay fast
+    from .replay_parser import ReplayParser
+    from .battle_simulator import BattleSimulator
     
     # Parse the replay
     parser_obj = ReplayParser()
@@ -74,71 +167,83 @@ def main():
     # Add metadata to results
     results['metadata'] = replay_data.get('metadata', {})
     
-    # Format output
-    if args.format == 'json':
-        output = json.dumps(results, indent=2)
-    else:
-        output = format_text_output(results)
-    
     # Write output
     if args.output:
         with open(args.output, 'w') as f:
-            f.write(output)
+            write_output(results, args.format, f)
         if args.verbose:
             print(f"Results written to {args.output}", file=sys.stderr)
     else:
-        print(output)
+        write_output(results, args.format, sys.stdout)
+
+
+def write_output(results: dict, output_format: str, out):
+    """Write results to a text stream in the requested format"""
+    if output_format == 'json':
+        json.dump(results, out, indent=2)
+        out.write("\n")
+    else:
+        write_text_output(results, out)
 
 
 def format_text_output(results: dict) -> str:
     """Format results as human-readable text"""
-    lines = []
+    buf = io.StringIO()
+    write_text_output(results, buf)
+    return buf.getvalue()[:-1]
+
+
+def write_text_output(results: dict, out):
+    """Write results as human-readable text, one line at a time"""
+    w = out.write
+    
+    def emit(line: str):
+        w(line)
+        w("\n")
     
     # Metadata
     metadata = results.get('metadata', {})
     if metadata:
-        lines.append("=" * 60)
-        lines.append("REPLAY INFORMATION")
-        lines.append("=" * 60)
+        emit("=" * 60)
+        emit("REPLAY INFORMATION")
+        emit("=" * 60)
         if 'format' in metadata:
-            lines.append(f"Format: {metadata['format']}")
+            emit(f"Format: {metadata['format']}")
         if 'players' in metadata:
-            lines.append(f"Players: {', '.join(metadata['players'])}")
+            emit(f"Players: {', '.join(metadata['players'])}")
         if 'rating' in metadata and metadata['rating']:
-            lines.append(f"Rating: {metadata['rating']}")
-        lines.append("")
+            emit(f"Rating: {metadata['rating']}")
+        emit("")
     
     # Teams
     teams = results.get('teams', {})
     pokemon_data = results.get('pokemon', {})
     
     for player, team in teams.items():
-        lines.append("=" * 60)
-        lines.append(f"TEAM {player.upper()}")
-        lines.append("=" * 60)
+        emit("=" * 60)
+        emit(f"TEAM {player.upper()}")
+        emit("=" * 60)
         
         for pokemon_name in team:
             pokemon_id = f"{player}:{pokemon_name}"
             if pokemon_id in pokemon_data:
                 data = pokemon_data[pokemon_id]
-                lines.append(f"\n{data['name']} ({data['species']}) - Level {data['level']}")
-                lines.append("-" * 40)
+                emit(f"\n{data['name']} ({data['species']}) - Level {data['level']}")
+                emit("-" * 40)
                 
                 if data['ability']:
-                    lines.append(f"  Ability: {data['ability']}")
+                    emit(f"  Ability: {data['ability']}")
                 if data['item']:
-                    lines.append(f"  Item: {data['item']}")
+                    emit(f"  Item: {data['item']}")
                 if data['moves']:
-                    lines.append(f"  Moves: {', '.join(data['moves'])}")
+                    emit(f"  Moves: {', '.join(data['moves'])}")
                 
-                lines.append(f"  Stats:")
-                lines.append(f"    K/D Ratio: {data['kd_ratio']:.2f} ({data['knockouts']}/{data['deaths']})")
-                lines.append(f"    Damage Dealt: {data['damage_dealt']}")
-                lines.append(f"    Damage Taken: {data['damage_taken']}")
+                emit(f"  Stats:")
+                emit(f"    K/D Ratio: {data['kd_ratio']:.2f} ({data['knockouts']}/{data['deaths']})")
+                emit(f"    Damage Dealt: {data['damage_dealt']}")
+                emit(f"    Damage Taken: {data['damage_taken']}")
         
-        lines.append("")
-    
-    return "\n".join(lines)
+        emit("")
 
 
 if __name__ == '__main__':
@@ -2,8 +2,78 @@
 Pokémon tracker for tracking revealed information during battle
 """
 
-from typing import Dict, List, Set, Optional
+import threading
+from typing import Dict, FrozenSet, List, Optional, Tuple
 from dataclasses import dataclass, field
+from functools import lru_cache
+
+
+# Move vocabulary shared by all Pokémon: each distinct move name gets one bit
+_MOVE_BITS: Dict[str, int] = {}
+_MOVE_NAMES: List[str] = []
+# Guards assigning new bits; lookups of known moves don't take it
+_MOVE_BITS_LOCK = threading.Lock()
+
+
+def _move_bit(move: str) -> int:
+    """Get the bit assigned to a move name, assigning the next one if new"""
+    try:
+        return _MOVE_BITS[move]
+    except KeyError:
+        pass
+    
+    with _MOVE_BITS_LOCK:
+        # Another thread may have assigned it while we waited
+        bit = _MOVE_BITS.get(move)
+        if bit is None:
+            bit = 1 << len(_MOVE_NAMES)
+            _MOVE_NAMES.append(move)
+            _MOVE_BITS[move] = bit
+        return bit
+
+
+def _move_names(mask: int) -> List[str]:
+    """List the move names set in a bitmask, in the order they were first seen"""
+    names = []
+    while mask:
+        low = mask & -mask
+        names.append(_MOVE_NAMES[low.bit_length() - 1])
+        mask ^= low
+    return names
+
+
+@lru_cache(maxsize=4096)
+def _parse_details(details: str) -> Tuple[str, int, str]:
+    """
+    Parse a details string such as "Pikachu, L50, M"
+    
+    Walks the ", "-separated fields by index instead of splitting into a list.
+    Results are memoized since the same details recur across replays.
+    
+    Returns:
+        Tuple of (species, level, gender); level defaults to 100 and gender to ""
+    """
+    level = 100
+    gender = ""
+    
+    end = details.find(', ')
+    if end < 0:
+        return details, level, gender
+    species = details[:end]
+    
+    while end >= 0:
+        start = end + 2
+        end = details.find(', ', start)
+        part = details[start:end] if end >= 0 else details[start:]
+        if part.startswith('L'):
+            try:
+                level = int(part[1:])
+            except ValueError:
+                pass
+        elif part == 'M' or part == 'F':
+            gender = part
+    
+    return species, level, gender
 
 
 @dataclass
@@ -14,8 +84,8 @@ class PokemonData:
     level: int = 100
     gender: str = ""
     
-    # Revealed information
-    moves: Set[str] = field(default_factory=set)
+    # Revealed information (moves are stored as a bitmask, see _move_bit)
+    move_mask: int = 0
     ability: Optional[str] = None
     item: Optional[str] = None
     
@@ -32,9 +102,14 @@ class PokemonData:
     # EV/IV inference data
     observed_stats: Dict[str, List[int]] = field(default_factory=dict)
     
+    @property
+    def moves(self) -> FrozenSet[str]:
+        """Revealed moves (read-only; use add_move to record one)"""
+        return frozenset(_move_names(self.move_mask))
+    
     def add_move(self, move: str):
         """Add a revealed move"""
-        self.moves.add(move)
+        self.move_mask |= _move_bit(move)
     
     def set_ability(self, ability: str):
         """Set the Pokémon's ability"""
@@ -66,10 +141,8 @@ class PokemonData:
         self.damage_taken += damage
     
     def get_kd_ratio(self) -> float:
-        """Calculate K/D ratio"""
-        if self.deaths == 0:
-            return float(self.knockouts)
-        return self.knockouts / self.deaths
+        """Calculate K/D ratio (deathless Pokémon divide by 1)"""
+        return self.knockouts / (self.deaths or 1)
 
 
 class PokemonTracker:
@@ -78,8 +151,15 @@ class PokemonTracker:
     def __init__(self):
         self.pokemon: Dict[str, PokemonData] = {}
         self.teams: Dict[str, List[str]] = {'p1': [], 'p2': []}
+    
+    def reset(self):
+        """Forget all tracked Pokémon, keeping the containers for reuse"""
+        self.pokemon.clear()
+        for team in self.teams.values():
+            team.clear()
         
-    def register_pokemon(self, player: str, position: str, name: str, details: str = ""):
+    def register_pokemon(self, player: str, position: str, name: str, details: str = "",
+                         pokemon_id: Optional[str] = None):
         """
         Register a new Pokémon
         
@@ -88,27 +168,16 @@ class PokemonTracker:
             position: Position identifier (p1a, p2b, etc.)
             name: Pokémon nickname
             details: Species and other details
+            pokemon_id: Precomputed "player:name" key, if the caller has one
         """
-        pokemon_id = f"{player}:{name}"
+        if pokemon_id is None:
+            pokemon_id = f"{player}:{name}"
         
         if pokemon_id not in self.pokemon:
-            # Parse details: "species, L##, gender"
-            species = name
-            level = 100
-            gender = ""
-            
             if details:
-                parts = details.split(', ')
-                if parts:
-                    species = parts[0]
-                for part in parts[1:]:
-                    if part.startswith('L'):
-                        try:
-                            level = int(part[1:])
-                        except ValueError:
-                            pass
-                    elif part in ['M', 'F']:
-                        gender = part
+                species, level, gender = _parse_details(details)
+            else:
+                species, level, gender = name, 100, ""
             
             self.pokemon[pokemon_id] = PokemonData(
                 name=name,
@@ -201,6 +270,37 @@ class PokemonTracker:
         if defender in self.pokemon:
             self.pokemon[defender].record_damage_taken(damage)
     
+    def apply_damage(self, defender: str, hp: int, max_hp: int, attacker: Optional[str] = None) -> Optional[int]:
+        """
+        Update a Pokémon's HP and record the damage taken in one step
+        
+        Args:
+            defender: Defending Pokémon identifier
+            hp: Current HP after the hit
+            max_hp: Maximum HP
+            attacker: Attacking Pokémon identifier, if known
+            
+        Returns:
+            Damage dealt, or None if the defender's previous HP was unknown
+        """
+        data = self.pokemon.get(defender)
+        if data is None:
+            return None
+        
+        old_hp = data.hp_current
+        data.hp_current = hp
+        data.hp_max = max_hp
+        if old_hp is None:
+            return None
+        
+        damage = old_hp - hp
+        data.damage_taken += damage
+        if attacker is not None:
+            attacker_data = self.pokemon.get(attacker)
+            if attacker_data is not None:
+                attacker_data.damage_dealt += damage
+        return damage
+    
     def get_pokemon(self, pokemon_id: str) -> Optional[PokemonData]:
         """Get Pokémon data by identifier"""
         return self.pokemon.get(pokemon_id)
@@ -221,12 +321,12 @@ class PokemonTracker:
                 'name': data.name,
                 'species': data.species,
                 'level': data.level,
-                'moves': list(data.moves),
+                'moves': _move_names(data.move_mask),
                 'ability': data.ability,
                 'item': data.item,
                 'knockouts': data.knockouts,
                 'deaths': data.deaths,
-                'kd_ratio': data.get_kd_ratio(),
+                'kd_ratio': data.knockouts / (data.deaths or 1),
                 'damage_dealt': data.damage_dealt,
                 'damage_taken': data.damage_taken,
             }
@@ -5,33 +5,315 @@ This module parses Pokémon Showdown replay pages and raw battle logs.
 It supports multiple extraction methods:
 - Inline script patterns (Replays.embed, Replays.append, Replays.render)
 - JSON-like data blobs in HTML pages
-- JSON endpoint fallback (appending .json to replay URLs)
+- JSON endpoint (appending .json to replay URLs), tried before the HTML page
 - Raw log file parsing
 
 The parser filters out chat/UI-only content and stops at terminal battle commands.
 """
 
+import io
+import os
 import re
 import json
-import urllib.request
-import urllib.error
-import ssl
-from typing import Dict, Any, List, Optional
+import sys
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from urllib.parse import urlsplit
+from typing import AnyStr, Dict, Any, Iterable, Iterator, List, Optional, Union
+
+# Use orjson for decoding replay JSON when installed (pip install espeonage[fast]);
+# both accept str or bytes and raise ValueError subclasses on bad input
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+_USER_AGENT = 'Espeonage-ReplayParser/0.1'
+
+# Shared HTTP session, created on first use (see _get_session)
+_session = None
+
+# Opening of inline script calls carrying replay JSON, tried in this order:
+# Replays.embed(...), Replays.append(...), Replays.render(...)
+_REPLAY_CALL_PATTERNS = tuple(
+    re.compile(r'Replays\s*\.\s*' + name + r'\s*\(')
+    for name in ('embed', 'append', 'render')
+)
+# Same patterns for undecoded pages, so only the JSON argument gets decoded
+_REPLAY_CALL_PATTERNS_BYTES = tuple(
+    re.compile(pattern.pattern.encode('ascii')) for pattern in _REPLAY_CALL_PATTERNS
+)
+
+# Characters that matter when scanning a JSON object literal
+_JSON_SPECIAL_RE = re.compile(r'[{}"\'\\]')
+_JSON_SPECIAL_RE_BYTES = re.compile(rb'[{}"\'\\]')
+
+# Sniffing the type of a replay file from its undecoded contents
+_JSON_OBJECT_START_RE = re.compile(rb'\s*\{')
+_HTML_MARKER_RE = re.compile(rb'<html|<script', re.IGNORECASE)
+
+# Trailing comma before a closing brace/bracket
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+
+# Chat and UI-only commands: chat, HTML boxes, errors, join/leave/rename
+# notices, raw HTML (e.g. rating updates) and debug output
+_FILTER = frozenset((
+    'c', 'c:', 'chat', 'html', 'error', 'j', 'J', 'l', 'L', 'n', 'N', 'raw', 'debug',
+))
+
+# Commands that end the battle
+_TERMINAL = frozenset(('win', 'tie', 'forcewin'))
+
+
+def _get_session():
+    """
+    Get the shared HTTP session used to fetch replays.
+    
+    Reusing one session keeps connections to the replay server alive across
+    requests (.json endpoint, HTML fallback, and further replays in a batch)
+    instead of paying a new TCP+TLS handshake each time. ``requests`` is
+    imported here so that offline parsing doesn't load it.
+    """
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['User-Agent'] = _USER_AGENT
+        
+        # Don't verify certificates
+        # This allows the tool to work on systems with certificate issues
+        # (the resulting warning is silenced per host, see _quiet_insecure_warning)
+        session.verify = False
+        
+        _session = session
+    return _session
+
+
+@lru_cache(maxsize=None)
+def _quiet_insecure_warning(host: Optional[str]) -> None:
+    """
+    Silence urllib3's unverified-HTTPS warning for replays fetched from ``host``.
+    
+    The filter matches that host only, so warnings for other requests made
+    by the importing application are left alone. Cached so each host adds
+    a single filter.
+    """
+    import warnings
+    from urllib3.exceptions import InsecureRequestWarning
+    
+    if host:
+        warnings.filterwarnings(
+            'ignore',
+            message=r"Unverified HTTPS request is being made to host '" + re.escape(host) + "'",
+            category=InsecureRequestWarning,
+        )
+
+
+class LogEntry(Mapping):
+    """
+    A single parsed battle log line.
+    
+    Stores ``type``, ``args`` and ``raw`` in slots rather than a per-entry
+    dict, while remaining a read-only mapping so existing code using
+    ``entry['type']``, ``entry.get('args')`` or ``'raw' in entry`` keeps
+    working.
+    """
+    
+    __slots__ = ('type', 'args', 'raw')
+    
+    _KEYS = ('type', 'args', 'raw')
+    
+    def __init__(self, type: str, args: List[str], raw: str):
+        self.type = type
+        self.args = args
+        self.raw = raw
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in self._KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._KEYS:
+            return getattr(self, key)
+        return default
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._KEYS
+    
+    def __iter__(self):
+        return iter(self._KEYS)
+    
+    def __len__(self) -> int:
+        return len(self._KEYS)
+    
+    def __repr__(self) -> str:
+        return f"LogEntry(type={self.type!r}, args={self.args!r}, raw={self.raw!r})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the entry as a plain dict (e.g. for JSON serialization)."""
+        return {'type': self.type, 'args': self.args, 'raw': self.raw}
+
+
+def _find_json_arg(html: AnyStr, start: int) -> Optional[AnyStr]:
+    """
+    Extract the JSON object literal starting at or after ``start``.
+    
+    Skips leading whitespace, then jumps between brace, quote and backslash
+    characters tracking brace depth (ignoring braces inside string literals)
+    until the matching ``}``. Runs in a single linear pass regardless of
+    nesting depth. Works on ``str`` or on undecoded UTF-8 ``bytes``, where
+    these ASCII characters never occur inside multi-byte sequences.
+    
+    Args:
+        html: Text containing the object literal
+        start: Index just past the opening parenthesis of the call
+        
+    Returns:
+        The object literal including its braces (same type as ``html``),
+        or None if there is no object at ``start`` or it is never closed.
+    """
+    if isinstance(html, bytes):
+        special, lbrace, rbrace, backslash = _JSON_SPECIAL_RE_BYTES, b'{', b'}', b'\\'
+    else:
+        special, lbrace, rbrace, backslash = _JSON_SPECIAL_RE, '{', '}', '\\'
+    
+    n = len(html)
+    i = start
+    while i < n and html[i:i + 1].isspace():
+        i += 1
+    if html[i:i + 1] != lbrace:
+        return None
+    
+    depth = 0
+    quote = None
+    pos = i
+    while True:
+        match = special.search(html, pos)
+        if match is None:
+            return None
+        j = match.start()
+        c = html[j:j + 1]
+        pos = j + 1
+        if quote is not None:
+            if c == backslash:
+                pos += 1
+            elif c == quote:
+                quote = None
+        elif c == lbrace:
+            depth += 1
+        elif c == rbrace:
+            depth -= 1
+            if depth == 0:
+                return html[i:pos]
+        elif c != backslash:
+            quote = c
+
+
+def _iter_log_objects(html: AnyStr) -> Iterator[AnyStr]:
+    """
+    Yield object literals that may hold a replay, i.e. have a "log" key.
+    
+    Makes one pass over the brace, quote and backslash characters (as in
+    _find_json_arg), keeping a stack of open objects and flagging the
+    innermost one whenever a ``"log"`` key appears in it. Quotes only start
+    a string inside an object, so apostrophes in page text are ignored.
+    The pass is linear in the page size however many keys it holds.
+    
+    Args:
+        html: Page text or undecoded UTF-8 bytes
+        
+    Yields:
+        Closed object literals with a "log" key (same type as ``html``),
+        outermost and earliest first
+    """
+    if isinstance(html, bytes):
+        special, key = _JSON_SPECIAL_RE_BYTES, b'"log"'
+        lbrace, rbrace, backslash, dquote = b'{', b'}', b'\\', b'"'
+    else:
+        special, key = _JSON_SPECIAL_RE, '"log"'
+        lbrace, rbrace, backslash, dquote = '{', '}', '\\', '"'
+    
+    stack = []  # [start, has_log_key] per open object
+    found = []  # (start, end) of closed objects with a "log" key
+    quote = None
+    pos = 0
+    while True:
+        match = special.search(html, pos)
+        if match is None:
+            break
+        j = match.start()
+        c = html[j:j + 1]
+        pos = j + 1
+        if quote is not None:
+            if c == backslash:
+                pos += 1
+            elif c == quote:
+                quote = None
+        elif c == lbrace:
+            stack.append([j, False])
+        elif c == rbrace:
+            if stack:
+                start, has_key = stack.pop()
+                if has_key:
+                    found.append((start, pos))
+        elif c != backslash and stack:
+            if c == dquote and html.startswith(key, j):
+                stack[-1][1] = True
+            quote = c
+    
+    found.sort()
+    for start, end in found:
+        yield html[start:end]
+
+
+def _parse_file_worker(filepath: str, keep_raw: bool) -> Dict[str, Any]:
+    """Parse one file in a worker process (module-level so it pickles)."""
+    return ReplayParser(keep_raw=keep_raw).parse_replay_file(filepath)
 
 
 class ReplayParser:
     """Parser for Pokémon Showdown replay data."""
     
-    def __init__(self):
+    def __init__(self, keep_raw: bool = True, cache_size: int = 0):
+        """
+        Args:
+            keep_raw: Keep each log entry's original line in ``raw``. Set to
+                False to store None instead and roughly halve the memory
+                retained by long battle logs.
+            cache_size: Number of parse_replay_file results to memoize, keyed
+                by path, modification time and size so edited files are
+                re-parsed. 0 (the default) disables the cache. Cached results
+                are shared between calls and must not be mutated.
+        """
+        self.keep_raw = keep_raw
         self.battle_log = []
         self.metadata = {}
+        self._file_cache = (
+            lru_cache(maxsize=cache_size)(self._parse_replay_file_cached)
+            if cache_size else None
+        )
+    
+    def clear_cache(self) -> None:
+        """Drop all memoized parse_replay_file results."""
+        if self._file_cache is not None:
+            self._file_cache.cache_clear()
     
     def parse_replay_url(self, url: str) -> Dict[str, Any]:
         """
         Parse a Pokémon Showdown replay from a URL.
         
-        Attempts to fetch and parse the HTML page, then falls back to 
-        the JSON endpoint if HTML parsing fails.
+        Tries the JSON endpoint (the URL with .json appended) first, since it
+        is much smaller than the page and needs no HTML extraction, then
+        falls back to fetching and parsing the HTML page.
         
         Args:
             url: The replay URL (e.g., https://replay.pokemonshowdown.com/gen9ou-2172099392)
@@ -40,44 +322,63 @@ class ReplayParser:
             Dict containing parsed replay data with metadata and battle_log,
             or an error dict if parsing fails.
         """
+        import requests
+        
+        session = _get_session()
+        _quiet_insecure_warning(urlsplit(url).hostname)
+        
+        # Try JSON endpoint
+        json_url = url.rstrip('/')
+        if not json_url.endswith('.json'):
+            json_url += '.json'
         try:
-            # Create SSL context that doesn't verify certificates
-            # This allows the tool to work on systems with certificate issues
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
+            json_response = session.get(json_url, timeout=10)
+            json_response.raise_for_status()
+            json_data = _json_loads(json_response.content)
             
+            # Check if JSON has valid replay data; anything else falls back
+            # to the HTML page
+            if isinstance(json_data, dict) and isinstance(json_data.get('log'), str):
+                return self.parse_replay_data(json_data)
+        except (requests.RequestException, ValueError):
+            # JSON endpoint unavailable or invalid, fall back to HTML
+            pass
+        
+        try:
             # Fetch HTML page
-            req = urllib.request.Request(url, headers={'User-Agent': 'Espeonage-ReplayParser/0.1'})
-            with urllib.request.urlopen(req, timeout=10, context=ssl_context) as response:
-                html = response.read().decode('utf-8')
+            response = session.get(url, timeout=10)
+            response.raise_for_status()
             
-            # Try to parse HTML
-            result = self.parse_replay_html(html, url=url)
+            # Scan the undecoded page; only the replay JSON gets decoded
+            return self.parse_replay_html(response.content, url=url)
             
-            # If HTML parsing failed, try JSON endpoint
-            if 'error' in result:
-                json_url = url.rstrip('/') + '.json'
-                try:
-                    json_req = urllib.request.Request(json_url, headers={'User-Agent': 'Espeonage-ReplayParser/0.1'})
-                    with urllib.request.urlopen(json_req, timeout=10, context=ssl_context) as json_response:
-                        json_data = json.loads(json_response.read().decode('utf-8'))
-                    
-                    # Check if JSON has valid replay data
-                    if json_data and isinstance(json_data, dict):
-                        return self.parse_replay_data(json_data)
-                except (urllib.error.URLError, json.JSONDecodeError, KeyError):
-                    # JSON fallback failed, return original HTML parse error
-                    pass
-            
-            return result
-            
-        except urllib.error.URLError as e:
+        except requests.RequestException as e:
             return {"error": f"Failed to fetch URL: {e}"}
         except Exception as e:
             return {"error": f"Unexpected error: {e}"}
     
-    def parse_replay_html(self, html: str, url: Optional[str] = None) -> Dict[str, Any]:
+    def parse_many(self, urls: List[str], workers: int = 8) -> List[Dict[str, Any]]:
+        """
+        Parse several replay URLs concurrently.
+        
+        Fetching is network-bound, so the URLs are fanned out over a thread
+        pool. Parsing returns its results rather than relying on instance
+        state, so one parser can serve every worker.
+        
+        Args:
+            urls: Replay URLs
+            workers: Maximum number of concurrent fetches
+            
+        Returns:
+            List of results in the same order as ``urls``, each as returned
+            by parse_replay_url.
+        """
+        # Create the shared session up front rather than racing in the workers
+        _get_session()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.parse_replay_url, urls))
+    
+    def parse_replay_html(self, html: Union[str, bytes], url: Optional[str] = None) -> Dict[str, Any]:
         """
         Parse replay data from HTML content.
         
@@ -85,51 +386,50 @@ class ReplayParser:
         and JSON-like data blobs containing replay information.
         
         Args:
-            html: HTML content from a replay page
+            html: HTML content from a replay page, as text or as undecoded
+                UTF-8 bytes (only the extracted JSON is then decoded)
             url: Optional URL for context/metadata
             
         Returns:
             Dict containing parsed replay data with metadata and battle_log,
             or {"error": "Could not parse replay data"} if parsing fails.
         """
-        # Pattern to match various Replays.* function calls with JSON data
-        # Matches: Replays.embed(...), Replays.append(...), Replays.render(...)
-        patterns = [
-            r'Replays\s*\.\s*embed\s*\(\s*({[^}]*(?:{[^}]*}[^}]*)*})\s*\)',
-            r'Replays\s*\.\s*append\s*\(\s*({[^}]*(?:{[^}]*}[^}]*)*})\s*\)\s*;?',
-            r'Replays\s*\.\s*render\s*\(\s*({[^}]*(?:{[^}]*}[^}]*)*})\s*\)\s*;?',
-        ]
-        
         replay_data = None
+        is_bytes = isinstance(html, bytes)
         
-        # Try each pattern
-        for pattern in patterns:
-            match = re.search(pattern, html, re.DOTALL)
-            if match:
+        # Try each Replays.embed/append/render call
+        for pattern in _REPLAY_CALL_PATTERNS_BYTES if is_bytes else _REPLAY_CALL_PATTERNS:
+            for match in pattern.finditer(html):
+                json_str = _find_json_arg(html, match.end())
+                if json_str is None:
+                    continue
                 try:
-                    json_str = match.group(1)
+                    if is_bytes:
+                        json_str = json_str.decode('utf-8')
                     # Clean up JavaScript-style quotes and trailing commas
                     json_str = self._clean_js_json(json_str)
-                    replay_data = json.loads(json_str)
+                    replay_data = _json_loads(json_str)
                     if replay_data and 'log' in replay_data:
                         break
-                except (json.JSONDecodeError, ValueError):
+                except ValueError:
+                    # Includes json.JSONDecodeError and UnicodeDecodeError
                     continue
+            if replay_data and 'log' in replay_data:
+                break
         
         # If inline patterns didn't work, try to find JSON blob with "log" key
         if not replay_data:
-            # Look for JSON-like structure with a "log" key
-            log_pattern = r'({[^{]*"log"\s*:\s*"[^"]*"[^}]*})'
-            matches = re.finditer(log_pattern, html, re.DOTALL)
-            for match in matches:
+            for json_str in _iter_log_objects(html):
                 try:
-                    json_str = match.group(1)
+                    if is_bytes:
+                        json_str = json_str.decode('utf-8')
                     json_str = self._clean_js_json(json_str)
-                    potential_data = json.loads(json_str)
-                    if potential_data and 'log' in potential_data:
+                    potential_data = _json_loads(json_str)
+                    if isinstance(potential_data, dict) and isinstance(potential_data.get('log'), str):
                         replay_data = potential_data
                         break
-                except (json.JSONDecodeError, ValueError):
+                except ValueError:
+                    # Includes json.JSONDecodeError and UnicodeDecodeError
                     continue
         
         if replay_data:
@@ -150,30 +450,82 @@ class ReplayParser:
             Dict containing parsed replay data with metadata and battle_log,
             or an error dict if parsing fails.
         """
+        if self._file_cache is not None:
+            try:
+                st = os.stat(filepath)
+            except OSError:
+                pass  # Let the uncached path report the error
+            else:
+                result = self._file_cache(filepath, st.st_mtime_ns, st.st_size)
+                if 'battle_log' in result:
+                    self.battle_log = result['battle_log']
+                    self.metadata = result['metadata']
+                return result
+        return self._parse_replay_file(filepath)
+    
+    def _parse_replay_file_cached(self, filepath: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+        # mtime_ns and size only make up the cache key
+        return self._parse_replay_file(filepath)
+    
+    def _parse_replay_file(self, filepath: str) -> Dict[str, Any]:
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
+            # Read undecoded; only the parts that are needed get decoded
+            with open(filepath, 'rb') as f:
                 content = f.read()
             
-            # Try to parse as JSON first
-            try:
-                data = json.loads(content)
-                if isinstance(data, dict) and 'log' in data:
-                    return self.parse_replay_data(data)
-            except json.JSONDecodeError:
-                pass
+            # Try to parse as JSON first (a replay object starts with '{')
+            if _JSON_OBJECT_START_RE.match(content):
+                try:
+                    data = _json_loads(content)
+                    if isinstance(data, dict) and 'log' in data:
+                        return self.parse_replay_data(data)
+                except ValueError:
+                    # Includes json.JSONDecodeError and UnicodeDecodeError
+                    pass
             
             # Check if it looks like HTML
-            if '<html' in content.lower() or '<script' in content.lower():
+            if _HTML_MARKER_RE.search(content):
                 return self.parse_replay_html(content, url=filepath if filepath.startswith('http') else None)
             
             # Try to parse as raw log
-            return self.parse_raw_log(content)
+            return self.parse_raw_log(content.decode('utf-8'))
             
         except FileNotFoundError:
             return {"error": f"File not found: {filepath}"}
         except Exception as e:
             return {"error": f"Error reading file: {e}"}
     
+    def parse_replay_files(
+        self,
+        filepaths: Iterable[str],
+        workers: Optional[int] = None,
+        chunksize: int = 8
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Parse several local replay files in parallel.
+        
+        Parsing is CPU-bound and each file is independent, so files are
+        spread over a process pool to use multiple cores.
+        
+        Args:
+            filepaths: Paths to replay files
+            workers: Number of worker processes (default: CPU count)
+            chunksize: Files sent to a worker per task; larger values cut
+                inter-process overhead for many small files, smaller values
+                balance load better for few large ones
+            
+        Yields:
+            Results in the same order as ``filepaths``, each as returned by
+            parse_replay_file.
+        """
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(
+                _parse_file_worker,
+                filepaths,
+                repeat(self.keep_raw),
+                chunksize=chunksize
+            )
+    
     def parse_replay_data(self, replay_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse replay data from a dictionary (typically from JSON).
@@ -187,22 +539,24 @@ class ReplayParser:
         Returns:
             Dict with 'metadata' and 'battle_log' keys
         """
-        self.battle_log = []
-        self.metadata = {}
-        
         # Extract metadata
+        metadata = {}
         for key in ['id', 'format', 'p1', 'p2', 'p1id', 'p2id', 'rating', 'uploadtime']:
             if key in replay_data:
-                self.metadata[key] = replay_data[key]
+                metadata[key] = replay_data[key]
         
         # Parse log
+        battle_log = []
         if 'log' in replay_data:
-            log_text = replay_data['log']
-            self._process_log(log_text)
+            battle_log = self._process_log(replay_data['log'])
+        
+        # Kept on the instance for callers that read the last result
+        self.battle_log = battle_log
+        self.metadata = metadata
         
         return {
-            'metadata': self.metadata,
-            'battle_log': self.battle_log
+            'metadata': metadata,
+            'battle_log': battle_log
         }
     
     def parse_raw_log(self, log_text: str) -> Dict[str, Any]:
@@ -215,121 +569,70 @@ class ReplayParser:
         Returns:
             Dict with 'metadata' and 'battle_log' keys
         """
-        self.battle_log = []
-        self.metadata = {}
-        self._process_log(log_text)
+        battle_log = self._process_log(log_text)
+        metadata = {}
+        
+        # Kept on the instance for callers that read the last result
+        self.battle_log = battle_log
+        self.metadata = metadata
         
         return {
-            'metadata': self.metadata,
-            'battle_log': self.battle_log
+            'metadata': metadata,
+            'battle_log': battle_log
         }
     
-    def _process_log(self, log_text: str) -> None:
+    def iter_battle_log(self, log_text: str) -> Iterator[LogEntry]:
         """
-        Process battle log text, filtering and parsing each line.
+        Lazily parse battle log text, one entry at a time.
         
-        Skips chat/UI lines and stops at terminal battle commands.
+        Yields the same entries parse_raw_log collects, so a consumer such as
+        BattleSimulator.process_battle_stream can handle each line as it is
+        parsed without building the whole list.
         
         Args:
-            log_text: The log text to process
+            log_text: Raw log text
+            
+        Yields:
+            Parsed log entries, skipping chat/UI lines and stopping after a
+            terminal battle command
         """
-        lines = log_text.split('\n')
+        keep_raw = self.keep_raw
         
-        for line in lines:
+        # Iterate lines lazily rather than materializing a list of every line
+        for line in io.StringIO(log_text):
             line = line.strip()
             
-            # Skip empty lines
-            if not line:
+            # Only pipe-prefixed lines are battle commands; this also skips
+            # empty lines and free-form text
+            if not line.startswith('|'):
                 continue
             
+            # Split once: ['', command, arg1, arg2, ...]
+            parts = line.split('|')
+            
             # Skip chat and UI-only lines
-            if self._should_skip_line(line):
+            if parts[1] in _FILTER:
                 continue
             
-            # Check if this is a terminal command
-            if self._is_terminal_command(line):
-                # Parse this final command and then stop
-                parsed = self._parse_log_line(line)
-                if parsed:
-                    self.battle_log.append(parsed)
-                break
-            
-            # Parse the line
-            parsed = self._parse_log_line(line)
-            if parsed:
-                self.battle_log.append(parsed)
-    
-    def _should_skip_line(self, line: str) -> bool:
-        """
-        Determine if a line should be skipped (chat/UI only).
-        
-        Args:
-            line: The log line to check
-            
-        Returns:
-            True if the line should be skipped
-        """
-        # Skip chat and UI lines
-        chat_prefixes = ['|c|', '|chat|', '|html|', '|error|']
-        for prefix in chat_prefixes:
-            if line.startswith(prefix):
-                return True
-        
-        # Skip non-pipe lines that aren't commands
-        if not line.startswith('|') and not line.startswith('-'):
-            return True
-        
-        return False
-    
-    def _is_terminal_command(self, line: str) -> bool:
-        """
-        Check if a line represents a terminal battle command.
-        
-        Terminal commands include: win, tie, forcewin
-        
-        Args:
-            line: The log line to check
+            # Only a few dozen distinct commands; share one string object each
+            command = sys.intern(parts[1])
+            yield LogEntry(command, parts[2:], line if keep_raw else None)
             
-        Returns:
-            True if this is a terminal command
-        """
-        if not line.startswith('|'):
-            return False
-        
-        parts = line.split('|')
-        if len(parts) < 2:
-            return False
-        
-        command = parts[1].lstrip('-')
-        terminal_commands = ['win', 'tie', 'forcewin']
-        
-        return command in terminal_commands
+            # Stop after a terminal command
+            if command.lstrip('-') in _TERMINAL:
+                return
     
-    def _parse_log_line(self, line: str) -> Optional[Dict[str, Any]]:
+    def _process_log(self, log_text: str) -> List[LogEntry]:
         """
-        Parse a single log line into a structured format.
+        Process battle log text, filtering and parsing each line.
         
         Args:
-            line: The log line to parse
+            log_text: The log text to process
             
         Returns:
-            Dict with parsed line data, or None if line couldn't be parsed
+            List of parsed log entries (see iter_battle_log)
         """
-        if not line.startswith('|'):
-            return None
-        
-        parts = line.split('|')[1:]  # Skip first empty element
-        if not parts:
-            return None
-        
-        command = parts[0]
-        args = parts[1:] if len(parts) > 1 else []
-        
-        return {
-            'type': command,
-            'args': args,
-            'raw': line
-        }
+        return list(self.iter_battle_log(log_text))
     
     def _clean_js_json(self, js_json: str) -> str:
         """
@@ -342,7 +645,7 @@ class ReplayParser:
             Cleaned JSON string
         """
         # Remove trailing commas before closing braces/brackets
-        js_json = re.sub(r',(\s*[}\]])', r'\1', js_json)
+        js_json = _TRAILING_COMMA_RE.sub(r'\1', js_json)
         
         # Handle single quotes (convert to double quotes)
         # This is a simplified approach - a full parser would be more robust
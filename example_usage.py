@@ -47,14 +47,14 @@ def main():
     result = parser.parse_raw_log(raw_log)
     print(f"  Battle log entries: {len(result['battle_log'])}")
     print(f"  Chat messages filtered: Yes (none in battle_log)")
-    print(f"  Last command: {result['battle_log'][-1]['command']}")
+    print(f"  Last command: {result['battle_log'][-1].type}")
     print()
     
     # Example 4: Parse from URL (would require network access)
     print("Example 4: Parsing from URL")
     print("  # This requires network access:")
     print("  # result = parser.parse_replay_url('https://replay.pokemonshowdown.com/gen9ou-2172099392')")
-    print("  # The parser will try HTML first, then fall back to .json endpoint if needed")
+    print("  # The parser will try the .json endpoint first, then fall back to the HTML page if needed")
 
 
 if __name__ == '__main__':
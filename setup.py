@@ -20,8 +20,12 @@ setup(
     python_requires=">=3.7",
     install_requires=[
         "requests>=2.31.0",
-        "beautifulsoup4>=4.12.0",
     ],
+    extras_require={
+        "fast": [
+            "orjson>=3.9",
+        ],
+    },
     entry_points={
         "console_scripts": [
             "espeonage=espeonage.cli:main",
@@ -0,0 +1,151 @@
+"""Tests for the battle simulator module."""
+
+import unittest
+from espeonage.replay_parser import ReplayParser
+from espeonage.battle_simulator import BattleSimulator
+
+
+BATTLE_LOG = (
+    "|player|p1|Alice|avatar\n"
+    "|player|p2|Bob|avatar\n"
+    "|gen|9\n"
+    "|tier|[Gen 9] OU\n"
+    "|switch|p1a: Pikachu|Pikachu, L50, M|150/150\n"
+    "|switch|p2a: Charizard|Charizard, L50, F|200/200\n"
+    "|turn|1\n"
+    "|move|p1a: Pikachu|Thunderbolt|p2a: Charizard\n"
+    "|-damage|p2a: Charizard|80/200\n"
+    "|move|p2a: Charizard|Flamethrower|p1a: Pikachu\n"
+    "|-damage|p1a: Pikachu|60/150\n"
+    "|-item|p1a: Pikachu|Light Ball\n"
+    "|-enditem|p1a: Pikachu|Light Ball\n"
+    "|turn|2\n"
+    "|move|p1a: Pikachu|Thunderbolt|p2a: Charizard\n"
+    "|-damage|p2a: Charizard|0 fnt\n"
+    "|faint|p2a: Charizard\n"
+    "|drag|p2a: Blastoise|Blastoise, L50|180/180\n"
+    "|-ability|p2a: Blastoise|Torrent\n"
+    "|win|Alice"
+)
+
+
+class TestBattleSimulator(unittest.TestCase):
+    """Test cases for BattleSimulator."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.battle_log = ReplayParser().parse_raw_log(BATTLE_LOG)['battle_log']
+        self.simulator = BattleSimulator()
+
+    def test_teams_registered(self):
+        """Test that switches and drags register team members."""
+        result = self.simulator.process_battle_log(self.battle_log)
+
+        self.assertEqual(result['teams']['p1'], ['Pikachu'])
+        self.assertEqual(result['teams']['p2'], ['Charizard', 'Blastoise'])
+
+        pikachu = result['pokemon']['p1:Pikachu']
+        self.assertEqual(pikachu['species'], 'Pikachu')
+        self.assertEqual(pikachu['level'], 50)
+        self.assertEqual(pikachu['item'], 'Light Ball')
+        self.assertEqual(result['pokemon']['p2:Blastoise']['ability'], 'Torrent')
+
+    def test_damage_and_knockouts(self):
+        """Test that damage and knockouts are credited to the attacker."""
+        result = self.simulator.process_battle_log(self.battle_log)
+
+        pikachu = result['pokemon']['p1:Pikachu']
+        charizard = result['pokemon']['p2:Charizard']
+
+        self.assertEqual(sorted(pikachu['moves']), ['Thunderbolt'])
+        self.assertEqual(pikachu['damage_dealt'], 200)
+        self.assertEqual(pikachu['damage_taken'], 90)
+        self.assertEqual(pikachu['knockouts'], 1)
+        self.assertEqual(charizard['damage_dealt'], 90)
+        self.assertEqual(charizard['damage_taken'], 200)
+        self.assertEqual(charizard['deaths'], 1)
+        self.assertEqual(charizard['kd_ratio'], 0.0)
+
+    def test_moves_read_only(self):
+        """Test that revealed moves are exposed as a read-only set."""
+        self.simulator.process_battle_log(self.battle_log)
+        pikachu = self.simulator.get_tracker().get_pokemon('p1:Pikachu')
+
+        self.assertEqual(pikachu.moves, frozenset({'Thunderbolt'}))
+        with self.assertRaises(AttributeError):
+            pikachu.moves.add('Surf')
+
+    def test_indirect_damage_not_credited(self):
+        """Test that hazard and status damage and KOs are not credited to the opponent."""
+        battle_log = ReplayParser().parse_raw_log(
+            "|switch|p1a: Pikachu|Pikachu, L50|150/150\n"
+            "|switch|p2a: Charizard|Charizard, L50|200/200\n"
+            "|move|p1a: Pikachu|Thunderbolt|p2a: Charizard\n"
+            "|-damage|p2a: Charizard|50/200\n"
+            "|-damage|p2a: Charizard|20/200|[from] psn\n"
+            "|move|p1a: Pikachu|Toxic|p2a: Charizard\n"
+            "|-damage|p2a: Charizard|0 fnt|[from] Stealth Rock\n"
+            "|faint|p2a: Charizard\n"
+            "|win|Alice"
+        )['battle_log']
+        result = self.simulator.process_battle_log(battle_log)
+
+        pikachu = result['pokemon']['p1:Pikachu']
+        charizard = result['pokemon']['p2:Charizard']
+
+        self.assertEqual(pikachu['damage_dealt'], 150)
+        self.assertEqual(pikachu['knockouts'], 0)
+        self.assertEqual(charizard['damage_taken'], 200)
+        self.assertEqual(charizard['deaths'], 1)
+
+    def test_process_battle_stream(self):
+        """Test that a lazily parsed log gives the same result as a list."""
+        expected = BattleSimulator().process_battle_log(self.battle_log)
+        entries = ReplayParser().iter_battle_log(BATTLE_LOG)
+
+        self.assertEqual(self.simulator.process_battle_stream(entries), expected)
+
+    def test_reset_reuses_simulator(self):
+        """Test that reset() clears state between battles."""
+        first = self.simulator.process_battle_log(self.battle_log)
+
+        self.simulator.reset()
+        self.assertEqual(self.simulator.tracker.pokemon, {})
+        self.assertEqual(self.simulator.active_pokemon, {'p1': None, 'p2': None})
+
+        second = self.simulator.process_battle_log(self.battle_log)
+        self.assertEqual(second, first)
+
+    def test_is_attack_move(self):
+        """Test that status moves are not treated as attacks."""
+        self.assertTrue(self.simulator._is_attack_move('Thunderbolt'))
+        self.assertFalse(self.simulator._is_attack_move('Stealth Rock'))
+        self.assertFalse(self.simulator._is_attack_move('Swords Dance'))
+        self.assertFalse(self.simulator._is_attack_move('swordsdance'))
+        self.assertFalse(self.simulator._is_attack_move("King's Shield"))
+
+    def test_non_attack_moves_names(self):
+        """Test that NON_ATTACK_MOVES holds display names and can be overridden."""
+        self.assertIn('Toxic', BattleSimulator.NON_ATTACK_MOVES)
+        self.assertIn("King's Shield", BattleSimulator.NON_ATTACK_MOVES)
+
+        class NoToxicSimulator(BattleSimulator):
+            NON_ATTACK_MOVES = BattleSimulator.NON_ATTACK_MOVES - {'Toxic'}
+
+        self.assertTrue(NoToxicSimulator()._is_attack_move('Toxic'))
+        self.assertFalse(NoToxicSimulator()._is_attack_move('Swords Dance'))
+
+    def test_unknown_commands_ignored(self):
+        """Test that unhandled command types are skipped."""
+        result = self.simulator.process_battle_log([
+            {'type': 'rated', 'args': []},
+            {'type': 'unknowncommand', 'args': ['x']},
+            {'args': []},
+        ])
+
+        self.assertEqual(result['pokemon'], {})
+        self.assertEqual(result['teams'], {'p1': [], 'p2': []})
+
+
+if __name__ == '__main__':
+    unittest.main()
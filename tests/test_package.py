@@ -0,0 +1,47 @@
+"""Tests for the package's lazily resolved attributes."""
+
+import subprocess
+import sys
+import unittest
+
+
+class TestPackage(unittest.TestCase):
+    """Test cases for espeonage/__init__.py."""
+
+    def run_fresh(self, code):
+        """Run code in a new interpreter, where no submodule is imported yet."""
+        return subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True
+        )
+
+    def test_submodule_attribute_access(self):
+        """Test that submodules resolve as attributes without an explicit import."""
+        result = self.run_fresh(
+            "import espeonage\n"
+            "for name in ('replay_parser', 'pokemon_tracker', 'battle_simulator',\n"
+            "             'damage_calculator', 'cli'):\n"
+            "    print(getattr(espeonage, name).__name__)\n"
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.split(), [
+            'espeonage.replay_parser', 'espeonage.pokemon_tracker',
+            'espeonage.battle_simulator', 'espeonage.damage_calculator',
+            'espeonage.cli',
+        ])
+
+    def test_public_names(self):
+        """Test that public names resolve lazily and are listed once by dir()."""
+        import espeonage
+
+        self.assertIs(espeonage.LogEntry, espeonage.replay_parser.LogEntry)
+        names = dir(espeonage)
+        self.assertEqual(len(names), len(set(names)))
+        self.assertIn('BattleSimulator', names)
+
+        with self.assertRaises(AttributeError):
+            espeonage.does_not_exist
+
+
+if __name__ == '__main__':
+    unittest.main()
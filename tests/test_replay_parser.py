@@ -68,6 +68,53 @@ class TestReplayParser(unittest.TestCase):
         # Check battle_log is not empty
         self.assertGreater(len(result['battle_log']), 0)
     
+    def test_parse_replay_html_bytes(self):
+        """Test parsing undecoded HTML bytes gives the same result as text."""
+        html_path = os.path.join(self.fixtures_dir, 'replay_embed.html')
+        with open(html_path, 'rb') as f:
+            html_bytes = f.read()
+        
+        from_bytes = self.parser.parse_replay_html(html_bytes)
+        from_text = self.parser.parse_replay_html(html_bytes.decode('utf-8'))
+        
+        self.assertNotIn('error', from_bytes)
+        self.assertEqual(from_bytes['metadata'], from_text['metadata'])
+        self.assertEqual(from_bytes['battle_log'], from_text['battle_log'])
+    
+    def test_parse_replay_html_nested_json(self):
+        """Test parsing HTML whose replay JSON has nested objects and braces in strings."""
+        html = (
+            '<html><body><script>\n'
+            'Replays.render( {"id": "gen9ou-nested", "format": "gen9ou", '
+            '"extra": {"a": {"b": [1, 2]}}, '
+            '"log": "|player|p1|A {x}|\\n|turn|1\\n|win|A {x}"} );\n'
+            '</script></body></html>'
+        )
+        
+        result = self.parser.parse_replay_html(html)
+        
+        self.assertNotIn('error', result)
+        self.assertEqual(result['metadata']['id'], 'gen9ou-nested')
+        self.assertEqual(result['battle_log'][-1]['type'], 'win')
+        self.assertEqual(result['battle_log'][-1]['args'], ['A {x}'])
+    
+    def test_parse_replay_html_log_blob(self):
+        """Test the fallback that finds a nested object with a "log" key in a script."""
+        html = (
+            "<html><body><p>Don't panic</p><script>\n"
+            'var junk = {"log": 1};\n'
+            'var data = {"id": "gen9ou-blob", "meta": {"rated": true}, '
+            '"log": "|turn|1\\n|win|Alice"};\n'
+            '</script></body></html>'
+        )
+        
+        for page in (html, html.encode('utf-8')):
+            result = self.parser.parse_replay_html(page)
+            
+            self.assertNotIn('error', result)
+            self.assertEqual(result['metadata']['id'], 'gen9ou-blob')
+            self.assertEqual(result['battle_log'][-1]['args'], ['Alice'])
+    
     def test_parse_replay_file_json(self):
         """Test parsing a JSON replay file."""
         json_path = os.path.join(self.fixtures_dir, 'replay.json')
@@ -104,6 +151,71 @@ class TestReplayParser(unittest.TestCase):
         # Check battle_log is not empty
         self.assertGreater(len(result['battle_log']), 0)
     
+    def test_parse_replay_files(self):
+        """Test parsing several files in parallel keeps input order."""
+        paths = [
+            os.path.join(self.fixtures_dir, 'replay.json'),
+            os.path.join(self.fixtures_dir, 'replay_append.html'),
+            os.path.join(self.fixtures_dir, 'missing.json'),
+        ]
+        
+        results = list(self.parser.parse_replay_files(paths, workers=2))
+        
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]['metadata']['id'], 'gen9ou-jsontest')
+        self.assertEqual(results[1]['metadata']['id'], 'gen9ou-2172099392')
+        self.assertEqual(results[1]['battle_log'][-1]['type'], 'win')
+        self.assertIn('error', results[2])
+    
+    def test_parse_replay_file_cache(self):
+        """Test that the opt-in file cache reuses results until the file changes."""
+        import tempfile
+        parser = ReplayParser(cache_size=4)
+        
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.log', delete=False) as f:
+            f.write("|turn|1\n|win|Alice\n")
+            temp_file = f.name
+        
+        try:
+            first = parser.parse_replay_file(temp_file)
+            self.assertIs(parser.parse_replay_file(temp_file), first)
+        
+            with open(temp_file, 'w') as f:
+                f.write("|turn|1\n|turn|2\n|win|Bob\n")
+            changed = parser.parse_replay_file(temp_file)
+            self.assertIsNot(changed, first)
+            self.assertEqual(changed['battle_log'][-1]['args'], ['Bob'])
+        
+            parser.clear_cache()
+            self.assertIsNot(parser.parse_replay_file(temp_file), changed)
+        finally:
+            os.unlink(temp_file)
+    
+    def test_parse_replay_url_malformed_json(self):
+        """Test that a JSON endpoint payload without a log string falls back to the page."""
+        from unittest import mock
+        
+        json_response = mock.Mock(content=b'{"log": 123}')
+        html_response = mock.Mock(content=b'<html>no replay here</html>')
+        session = mock.Mock()
+        session.get.side_effect = [json_response, html_response]
+        
+        with mock.patch('espeonage.replay_parser._get_session', return_value=session):
+            result = self.parser.parse_replay_url('https://replay.pokemonshowdown.com/gen9ou-1')
+        
+        self.assertIn('error', result)
+        self.assertEqual(session.get.call_count, 2)
+    
+    def test_iter_battle_log(self):
+        """Test that iter_battle_log yields entries lazily."""
+        log = "|turn|1\n|c|Alice|hi\n|turn|2\n|win|Alice\n|turn|3\n"
+        entries = self.parser.iter_battle_log(log)
+        
+        self.assertEqual(next(entries)['args'], ['1'])
+        self.assertEqual([e['type'] for e in entries], ['turn', 'win'])
+        self.assertEqual(list(self.parser.iter_battle_log(log)),
+                         self.parser.parse_raw_log(log)['battle_log'])
+    
     def test_parse_raw_log(self):
         """Test parsing a raw log string."""
         log = (
@@ -151,6 +263,24 @@ class TestReplayParser(unittest.TestCase):
         for entry in result['battle_log']:
             self.assertNotIn(entry['type'], ['c', 'chat', 'html', 'error'])
     
+    def test_ui_notice_filtering(self):
+        """Test that join/leave/rename, raw and debug lines are filtered out."""
+        log = (
+            "|j|Spectator\n"
+            "|player|p1|Player1|avatar\n"
+            "|l|Spectator\n"
+            "|n|Player1|oldname\n"
+            "|raw|<div>Rating: 1500</div>\n"
+            "|debug|some debug output\n"
+            "|turn|1\n"
+            "|win|Player1"
+        )
+        
+        result = self.parser.parse_raw_log(log)
+        
+        commands = [entry['type'] for entry in result['battle_log']]
+        self.assertEqual(commands, ['player', 'turn', 'win'])
+    
     def test_terminal_command_stops_parsing(self):
         """Test that parsing stops at terminal commands."""
         log = (
@@ -216,6 +346,36 @@ class TestReplayParser(unittest.TestCase):
         self.assertEqual(len(entry['args']), 3)
         self.assertEqual(entry['raw'], '|switch|p1a: Pikachu|Pikachu, L50|150/150')
     
+    def test_keep_raw_disabled(self):
+        """Test that raw lines are dropped when keep_raw is False."""
+        parser = ReplayParser(keep_raw=False)
+        result = parser.parse_raw_log("|switch|p1a: Pikachu|Pikachu, L50|150/150\n")
+        
+        entry = result['battle_log'][0]
+        self.assertEqual(entry['type'], 'switch')
+        self.assertEqual(len(entry['args']), 3)
+        self.assertIsNone(entry['raw'])
+    
+    def test_log_entry_interfaces(self):
+        """Test that log entries support attribute, mapping and dict access."""
+        result = self.parser.parse_raw_log("|move|p1a: Pikachu|Thunderbolt|p2a: Charizard\n")
+        
+        entry = result['battle_log'][0]
+        self.assertEqual(entry.type, 'move')
+        self.assertEqual(entry.args, ['p1a: Pikachu', 'Thunderbolt', 'p2a: Charizard'])
+        self.assertEqual(entry.get('type'), 'move')
+        self.assertIsNone(entry.get('missing'))
+        with self.assertRaises(KeyError):
+            entry['missing']
+        
+        expected = {
+            'type': 'move',
+            'args': ['p1a: Pikachu', 'Thunderbolt', 'p2a: Charizard'],
+            'raw': '|move|p1a: Pikachu|Thunderbolt|p2a: Charizard',
+        }
+        self.assertEqual(entry.to_dict(), expected)
+        self.assertEqual(dict(entry), expected)
+    
     def test_parse_replay_file_raw_log(self):
         """Test parsing a raw log file (like example_replay.log)."""
         # Create a temporary raw log file